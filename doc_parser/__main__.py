@@ -3,7 +3,9 @@ from typing import Any, IO, List, Optional, Sequence, Tuple
 import argparse
 import enum
 
-from .parser import parse_commands
+from .mapping import overlay_mappings, parse_mappings
+from .parser import parse_help_file
+from .source import Source
 
 
 class Mode(enum.Enum):
@@ -31,15 +33,6 @@ class Mode(enum.Enum):
         self.flags_column = None if len(column_indices) == 2 else column_indices[1]
         self.description_column = column_indices[-1]
 
-    def next(self) -> Optional["Mode"]:
-        found_self = False
-        for mode in self.__class__:
-            if found_self:
-                return mode
-            if mode == self:
-                found_self = True
-        return None
-
 
 class CharacterType(enum.Enum):
     LITERAL = enum.auto()
@@ -191,16 +184,27 @@ class Command:
         return f"Command({self.mode}, {self.tag}, {self.chars}, {self.description})"
 
 
-def main(index_fp: IO[str]) -> None:
-    commands = parse_commands(index_fp)
+def main(index_path: Source, vimrc_fp: Optional[IO[str]] = None) -> None:
+    commands = parse_help_file(index_path)
     print(len(commands))
 
+    if vimrc_fp is not None:
+        overlay = overlay_mappings(commands, parse_mappings(vimrc_fp))
+        for mapping, builtin in overlay.overrides:
+            print(f"{mapping} overrides {builtin}")
+        for mapping, builtin in overlay.shadowed:
+            print(f"{mapping} shadows {builtin}")
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument(
-        "-f", type=argparse.FileType("r"), dest="index_fp", required=True
+        "-f",
+        dest="index_path",
+        required=True,
+        help='path to index.txt (may be .gz/.xz/.bz2-compressed), or "-" for stdin',
     )
+    parser.add_argument("-m", type=argparse.FileType("r"), dest="vimrc_fp")
     args = parser.parse_args()
 
-    main(args.index_fp)
+    main(args.index_path, args.vimrc_fp)
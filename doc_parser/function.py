@@ -0,0 +1,28 @@
+from typing import Optional
+
+import re
+
+
+COLUMN_GAP_RE = re.compile(r" {2,}")
+
+
+class Function:
+    def __init__(self, name: str, usage: str, result: Optional[str], description: str):
+        self.name = name
+        self.usage = usage
+        self.result = result
+        self.description = description
+
+    def append_description(self, more_description: str):
+        if self.result is None:
+            # the usage filled the whole line, so the result starts this one
+            self.result, *rest = COLUMN_GAP_RE.split(more_description, 1)
+            more_description = rest[0] if rest else ""
+        if not more_description:
+            return
+        if self.description:
+            self.description += " "
+        self.description += more_description
+
+    def __str__(self) -> str:
+        return f"Function({self.name}, {self.usage}, {self.result}, {self.description})"
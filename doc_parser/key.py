@@ -238,6 +238,29 @@ class Trie(Generic[T]):
                 return len(needle) - i, key
         return 0, None
 
+    def get_longest_prefix(self, haystack: str) -> Tuple[int, Optional[T]]:
+        node = self.root
+        match: Tuple[int, Optional[T]] = (0, None)
+        for i, char in enumerate(haystack):
+            node = node.get(char)
+            if node is None:
+                break
+            if node.is_leaf():
+                match = (i + 1, node.value)
+        return match
+
+
+def build_trie(
+    key_types: Optional[Set[KeyType]] = None, lowercase: bool = False
+) -> Trie[Key]:
+    trie = Trie[Key]()
+    for key in Key:
+        if key_types is not None and key.key_type not in key_types:
+            continue
+        for pattern in key.patterns:
+            trie.insert(pattern.lower() if lowercase else pattern, key)
+    return trie
+
 
 def parse_line(trie: Trie[Key], line: str) -> Sequence[KeyCombination]:
 
@@ -294,11 +317,7 @@ def parse_line(trie: Trie[Key], line: str) -> Sequence[KeyCombination]:
 
 if __name__ == "__main__":
 
-    trie = Trie[Key]()
-
-    for key in Key:
-        for pattern in key.patterns:
-            trie.insert(pattern, key)
+    trie = build_trie()
 
     # trie.dump()
 
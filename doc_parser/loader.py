@@ -0,0 +1,99 @@
+from typing import Optional, Sequence
+
+import logging
+import os
+import threading
+
+from .command import Command
+from .key import Key, Trie, build_trie
+from .parser import parse_help_file
+from .source import Source
+
+
+logger = logging.getLogger(__name__)
+
+
+class Snapshot:
+    """
+    A fully built command table and key trie. Never mutated once published, so
+    any number of threads can read it without locking.
+    """
+
+    def __init__(self, source: Source, commands: Sequence[Command], trie: Trie[Key]):
+        self.source = source
+        self.commands = tuple(commands)
+        self.trie = trie
+
+    def __str__(self) -> str:
+        return f"Snapshot({self.source}, {len(self.commands)} commands)"
+
+
+def build_snapshot(source: Source) -> Snapshot:
+    return Snapshot(source, parse_help_file(source), build_trie())
+
+
+class LazyLoader:
+    """
+    Builds a `Snapshot` on first use. Threads that ask for it while the build is
+    running wait for that build instead of starting their own; afterwards, `get`
+    is a plain attribute read.
+    """
+
+    def __init__(self, source: Source):
+        self.source = source
+        self.lock = threading.Lock()
+        self.snapshot: Optional[Snapshot] = None
+
+    def get(self) -> Snapshot:
+        snapshot = self.snapshot
+        if snapshot is not None:
+            return snapshot
+        with self.lock:
+            # another thread may have finished the build while we waited
+            if self.snapshot is None:
+                self.snapshot = build_snapshot(self.source)
+                logger.debug(f"loaded {self.snapshot}")
+            return self.snapshot
+
+    def reload(self, source: Optional[Source] = None) -> Snapshot:
+        with self.lock:
+            if source is not None:
+                self.source = source
+            # readers keep using the old snapshot until the new one is complete
+            snapshot = build_snapshot(self.source)
+            self.snapshot = snapshot
+            logger.debug(f"reloaded {snapshot}")
+            return snapshot
+
+
+default_loader: Optional[LazyLoader] = None
+default_loader_lock = threading.Lock()
+
+
+def configure(source: Source) -> LazyLoader:
+    global default_loader
+    with default_loader_lock:
+        default_loader = LazyLoader(source)
+        return default_loader
+
+
+def get_loader() -> LazyLoader:
+    global default_loader
+    loader = default_loader
+    if loader is not None:
+        return loader
+    with default_loader_lock:
+        if default_loader is None:
+            runtime = os.environ.get("VIMRUNTIME")
+            if runtime is None:
+                raise RuntimeError("call configure() or set $VIMRUNTIME first")
+            default_loader = LazyLoader(os.path.join(runtime, "doc", "index.txt"))
+        return default_loader
+
+
+def get_snapshot() -> Snapshot:
+    return get_loader().get()
+
+
+def reload(source: Optional[Source] = None) -> Snapshot:
+    return get_loader().reload(source)
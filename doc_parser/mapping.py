@@ -0,0 +1,408 @@
+from typing import Dict, FrozenSet, IO, List, Optional, Sequence, Set, Tuple, Union
+
+import logging
+import re
+
+from .command import Command
+from .key import Key, KeyType, Trie, build_trie
+from .mode import Mode
+
+logger = logging.getLogger(__name__)
+
+
+Keys = Tuple[str, ...]
+
+
+NORMAL_MODES = frozenset(
+    (
+        Mode.NormalMode,
+        Mode.WindowCommandMode,
+        Mode.SquareBracketCommandMode,
+        Mode.GCommandMode,
+        Mode.ZCommandMode,
+    )
+)
+VISUAL_MODES = frozenset((Mode.VisualMode, Mode.TextObjectMode))
+OPERATOR_PENDING_MODES = frozenset((Mode.OperatorPendingMode, Mode.TextObjectMode))
+INSERT_MODES = frozenset((Mode.InsertMode, Mode.CtrlXSubMode, Mode.CompletionMode))
+COMMAND_LINE_MODES = frozenset((Mode.CommandLineMode,))
+TERMINAL_MODES = frozenset((Mode.TerminalJobMode,))
+
+# (full name, shortest accepted abbreviation, is_recursive, modes)
+MAP_COMMANDS: Sequence[Tuple[str, int, bool, FrozenSet[Mode]]] = (
+    ("map", 3, True, NORMAL_MODES | VISUAL_MODES | OPERATOR_PENDING_MODES),
+    ("nmap", 2, True, NORMAL_MODES),
+    ("vmap", 2, True, VISUAL_MODES),
+    ("xmap", 2, True, VISUAL_MODES),
+    ("omap", 2, True, OPERATOR_PENDING_MODES),
+    ("map!", 4, True, INSERT_MODES | COMMAND_LINE_MODES),
+    ("imap", 2, True, INSERT_MODES),
+    ("cmap", 2, True, COMMAND_LINE_MODES),
+    ("tmap", 3, True, TERMINAL_MODES),
+    ("noremap", 2, False, NORMAL_MODES | VISUAL_MODES | OPERATOR_PENDING_MODES),
+    ("nnoremap", 2, False, NORMAL_MODES),
+    ("vnoremap", 2, False, VISUAL_MODES),
+    ("xnoremap", 2, False, VISUAL_MODES),
+    ("onoremap", 3, False, OPERATOR_PENDING_MODES),
+    ("noremap!", 3, False, INSERT_MODES | COMMAND_LINE_MODES),
+    ("inoremap", 3, False, INSERT_MODES),
+    ("cnoremap", 3, False, COMMAND_LINE_MODES),
+    ("tnoremap", 3, False, TERMINAL_MODES),
+)
+
+MAP_ARGUMENTS = (
+    "<buffer>",
+    "<nowait>",
+    "<silent>",
+    "<special>",
+    "<script>",
+    "<expr>",
+    "<unique>",
+)
+
+KEY_ALIASES: Dict[str, str] = {
+    "lt": "<",
+    "bar": "|",
+    "bslash": "\\",
+    "enter": "<CR>",
+    "return": "<CR>",
+    "nul": "CTRL-@",
+}
+
+DEFAULT_LEADER = "\\"
+
+# stands in for everything from a builtin's first "{char}"/"{motion}"/...
+# placeholder onwards, since any keys typed there complete the command
+TAKES_ARGUMENT = "{...}"
+
+MAP_COMMAND_RE = re.compile(r"^[:\s]*([a-z]+!?)\s+(.*)$")
+LEADER_RE = re.compile(
+    r"^[:\s]*let\s+(?:g:)?(mapleader|maplocalleader)\s*=\s*([\"'])(.*)\2\s*$"
+)
+
+
+def build_map_command_table() -> Dict[str, Tuple[bool, FrozenSet[Mode]]]:
+    table: Dict[str, Tuple[bool, FrozenSet[Mode]]] = {}
+    for name, min_length, is_recursive, modes in MAP_COMMANDS:
+        bang = name.endswith("!")
+        stem = name.rstrip("!")
+        for length in range(min_length - int(bang), len(stem) + 1):
+            table.setdefault(
+                stem[:length] + ("!" if bang else ""), (is_recursive, modes)
+            )
+    return table
+
+
+class Mapping:
+    def __init__(
+        self,
+        command: str,
+        lhs: str,
+        rhs: str,
+        keys: Keys,
+        modes: FrozenSet[Mode],
+        is_recursive: bool,
+        line_number: int,
+    ):
+        self.command = command
+        self.lhs = lhs
+        self.rhs = rhs
+        self.keys = keys
+        self.modes = modes
+        self.is_recursive = is_recursive
+        self.line_number = line_number
+
+    def __str__(self) -> str:
+        return (
+            f"Mapping({self.command}, {self.lhs}, {self.rhs}, line={self.line_number})"
+        )
+
+
+class KeyTokenizer:
+    """
+    Turns both help-file key notation ("CTRL-W CTRL-B", "<S-Up>", "f{char}") and
+    mapping key notation ("<C-w><C-b>", "<s-up>") into the same tuple of canonical
+    key names, so that the two can be compared by hashing.
+    """
+
+    def __init__(self, trie: Optional[Trie[Key]] = None):
+        if trie is None:
+            trie = build_trie({KeyType.NAMED, KeyType.MODIFIER}, lowercase=True)
+        self.trie = trie
+        self.multiword_patterns = {
+            pattern
+            for key in Key
+            if key.key_type is KeyType.MULTIWORD
+            for pattern in key.patterns
+        }
+
+    def canonicalize(
+        self,
+        name: str,
+        with_control: bool = False,
+        with_alt: bool = False,
+        with_shift: bool = False,
+    ) -> str:
+        if len(name) == 1 and name.isalpha() and with_shift:
+            name = name.upper()
+            with_shift = False
+        if len(name) == 1 and with_control and not with_alt and not with_shift:
+            return "CTRL-" + name.upper()
+        if len(name) == 1 and not with_control and not with_alt and not with_shift:
+            return "<Space>" if name == " " else name
+        prefix = ""
+        if with_control:
+            prefix += "C-"
+        if with_alt:
+            prefix += "A-"
+        if with_shift:
+            prefix += "S-"
+        return f"<{prefix}{name}>"
+
+    def tokenize_bracketed(self, inner: str, with_control: bool = False) -> str:
+        alias = KEY_ALIASES.get(inner.lower())
+        if alias is not None and not with_control:
+            return alias
+
+        with_alt = False
+        with_shift = False
+        rest = inner
+        while len(rest) > 2:
+            if rest[:2].lower() == "m-":
+                # <M-x> is the same key as <A-x>
+                length, key = 2, Key.ALT
+            else:
+                length, key = self.trie.get_longest_match(rest.lower())
+            if (
+                key is None
+                or key.key_type is not KeyType.MODIFIER
+                or length == len(rest)
+            ):
+                break
+            if key is Key.CONTROL:
+                with_control = True
+            elif key is Key.ALT:
+                with_alt = True
+            elif key is Key.SHIFT:
+                with_shift = True
+            rest = rest[length:]
+
+        if len(rest) == 1:
+            name = rest
+        else:
+            key = self.trie.get(rest.lower())
+            if key is not None and key.key_type is KeyType.NAMED:
+                name = key.patterns[0]
+            elif rest.lower() in KEY_ALIASES and len(KEY_ALIASES[rest.lower()]) == 1:
+                name = KEY_ALIASES[rest.lower()]
+            else:
+                # unknown to the help files (<F5>, <Plug>, ...), keep it verbatim
+                name = rest
+        return self.canonicalize(name, with_control, with_alt, with_shift)
+
+    def tokenize(self, text: str, from_help: bool = False) -> Optional[Keys]:
+        if from_help:
+            if text in self.multiword_patterns:
+                return None
+            if text.startswith('["x]'):
+                text = text[4:]
+
+        tokens: List[str] = []
+        index = 0
+        while index < len(text):
+            with_control = False
+            if from_help and text.startswith("CTRL-", index) and index + 5 < len(text):
+                with_control = True
+                index += 5
+
+            char = text[index]
+            if char == "<" and ">" in text[index + 2 :]:
+                close_index = text.index(">", index + 2)
+                tokens.append(
+                    self.tokenize_bracketed(text[index + 1 : close_index], with_control)
+                )
+                index = close_index + 1
+            elif from_help and char == "{" and "}" in text[index + 1 :]:
+                close_index = text.index("}", index + 1)
+                tokens.append(text[index : close_index + 1])
+                index = close_index + 1
+            elif from_help and char == " " and not with_control:
+                index += 1
+            else:
+                tokens.append(self.canonicalize(char, with_control))
+                index += 1
+
+        if not tokens:
+            return None
+        return tuple(tokens)
+
+
+def parse_mappings(
+    vimrc_fp: IO[str], tokenizer: Optional[KeyTokenizer] = None
+) -> Sequence[Mapping]:
+
+    if tokenizer is None:
+        tokenizer = KeyTokenizer()
+    map_commands = build_map_command_table()
+    leaders = {"mapleader": DEFAULT_LEADER, "maplocalleader": DEFAULT_LEADER}
+    mappings: List[Mapping] = []
+
+    for line_number, line in enumerate(vimrc_fp, start=1):
+        line = line.strip()
+        if not line or line.startswith('"'):
+            continue
+
+        match = LEADER_RE.match(line)
+        if match is not None:
+            name, quote, value = match.groups()
+            if quote == '"':
+                value = value.replace("\\<", "<").replace("\\\\", "\\")
+            leaders[name] = value
+            logger.debug(f"{name} = {value!r}")
+            continue
+
+        match = MAP_COMMAND_RE.match(line)
+        if match is None or match.group(1) not in map_commands:
+            continue
+        command, rest = match.groups()
+        is_recursive, modes = map_commands[command]
+
+        rest = rest.lstrip()
+        while True:
+            for argument in MAP_ARGUMENTS:
+                if rest[: len(argument)].lower() == argument:
+                    rest = rest[len(argument) :].lstrip()
+                    break
+            else:
+                break
+
+        parts = rest.split(None, 1)
+        if len(parts) != 2:
+            # listing (":nmap x") rather than defining a mapping
+            logger.debug(f'Invalid mapping: "{line}"')
+            continue
+        lhs, rhs = parts
+
+        expanded_lhs = re.sub(
+            "<leader>", lambda _: leaders["mapleader"], lhs, flags=re.IGNORECASE
+        )
+        expanded_lhs = re.sub(
+            "<localleader>",
+            lambda _: leaders["maplocalleader"],
+            expanded_lhs,
+            flags=re.IGNORECASE,
+        )
+        keys = tokenizer.tokenize(expanded_lhs)
+        if keys is None:
+            logger.debug(f'Invalid mapping: "{line}"')
+            continue
+
+        mapping = Mapping(command, lhs, rhs, keys, modes, is_recursive, line_number)
+        logger.debug(f"created {mapping}")
+        mappings.append(mapping)
+
+    return mappings
+
+
+class CommandIndex:
+    """
+    Hashes builtin commands by (mode, canonical keys), so that each mapping can be
+    resolved with a handful of dict lookups instead of a scan over every builtin.
+    Builtins that take an argument ("d{motion}", "CTRL-V {char}") are hashed by
+    their fixed keys followed by TAKES_ARGUMENT.
+    """
+
+    def __init__(
+        self, commands: Sequence[Command], tokenizer: Optional[KeyTokenizer] = None
+    ):
+        if tokenizer is None:
+            tokenizer = KeyTokenizer()
+        self.tokenizer = tokenizer
+        self.by_keys: Dict[Tuple[Mode, Keys], Command] = {}
+        for command in commands:
+            keys = tokenizer.tokenize(command.chars, from_help=True)
+            if keys is None:
+                logger.debug(f"Cannot index {command}")
+                continue
+            for i, token in enumerate(keys):
+                if token.startswith("{") and token.endswith("}"):
+                    keys = keys[:i] + (TAKES_ARGUMENT,)
+                    break
+            if keys[0] == TAKES_ARGUMENT:
+                # no fixed keys to map over ("{count}%", "{char1}<BS>{char2}")
+                logger.debug(f"Cannot index {command}")
+                continue
+            self.by_keys.setdefault((command.mode, keys), command)
+
+    def get(self, mode: Mode, keys: Keys) -> Optional[Command]:
+        return self.by_keys.get((mode, keys), None)
+
+    def get_with_argument(self, mode: Mode, keys: Keys) -> Optional[Command]:
+        return self.by_keys.get((mode, keys + (TAKES_ARGUMENT,)), None)
+
+
+class MappingOverlay:
+    def __init__(self):
+        self.commands: Dict[Mode, Dict[Keys, Union[Command, Mapping]]] = {}
+        self.overrides: List[Tuple[Mapping, Command]] = []
+        self.shadowed: List[Tuple[Mapping, Command]] = []
+
+    def get(self, mode: Mode, keys: Keys) -> Optional[Union[Command, Mapping]]:
+        return self.commands.get(mode, {}).get(keys, None)
+
+
+def overlay_mappings(
+    commands: Sequence[Command],
+    mappings: Sequence[Mapping],
+    index: Optional[CommandIndex] = None,
+) -> MappingOverlay:
+
+    if index is None:
+        index = CommandIndex(commands)
+
+    overlay = MappingOverlay()
+    for (mode, keys), command in index.by_keys.items():
+        overlay.commands.setdefault(mode, {})[keys] = command
+
+    seen_overrides: Set[Tuple[Mode, Keys]] = set()
+    seen_shadowed: Set[Tuple[Mode, Keys]] = set()
+    for mapping in mappings:
+        # an exact builtin wins, even in a sibling table ("gx" is listed under
+        # GCommandMode, not as the "g{char}" of NormalMode); otherwise the
+        # argument form it's the fixed part of ("d" for "d{motion}") or a
+        # filled-in instance of ("ma" for "m{a-zA-Z}")
+        overridden: List[Tuple[Mode, Command]] = []
+        for mode in mapping.modes:
+            builtin = index.get(mode, mapping.keys)
+            if builtin is not None:
+                overridden.append((mode, builtin))
+        if not overridden:
+            for mode in mapping.modes:
+                length = len(mapping.keys)
+                builtin = index.get_with_argument(mode, mapping.keys)
+                while builtin is None and length > 1:
+                    length -= 1
+                    builtin = index.get_with_argument(mode, mapping.keys[:length])
+                if builtin is not None:
+                    overridden.append((mode, builtin))
+        for mode, builtin in overridden:
+            if (mode, mapping.keys) not in seen_overrides:
+                seen_overrides.add((mode, mapping.keys))
+                overlay.overrides.append((mapping, builtin))
+                logger.debug(f"{mapping} overrides {builtin}")
+
+        for mode in mapping.modes:
+            table = overlay.commands.setdefault(mode, {})
+            table[mapping.keys] = mapping
+
+            # a builtin that is a strict prefix of the mapping now has to wait
+            # for 'timeoutlen' before it fires
+            for length in range(1, len(mapping.keys)):
+                prefix = mapping.keys[:length]
+                builtin = index.get(mode, prefix)
+                if builtin is not None and (mode, prefix) not in seen_shadowed:
+                    seen_shadowed.add((mode, prefix))
+                    overlay.shadowed.append((mapping, builtin))
+                    logger.debug(f"{mapping} shadows {builtin}")
+
+    return overlay
@@ -27,12 +27,3 @@ class Mode(enum.Enum):
         self.chars_column = column_indices[0]
         self.flags_column = None if len(column_indices) == 2 else column_indices[1]
         self.description_column = column_indices[-1]
-
-    def next(self) -> Optional["Mode"]:
-        found_self = False
-        for mode in self.__class__:
-            if found_self:
-                return mode
-            if mode == self:
-                found_self = True
-        return None
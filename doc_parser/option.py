@@ -0,0 +1,57 @@
+from typing import Optional
+
+import re
+
+
+SCOPE_RE = re.compile(r"^(global|local to)\b")
+
+
+def has_unclosed_paren(text: str) -> bool:
+    # parens inside a quoted value ("(:),{:},[:]") don't count
+    depth = 0
+    in_quote = False
+    index = 0
+    while index < len(text):
+        char = text[index]
+        if in_quote and char == "\\":
+            index += 1
+        elif char == '"':
+            in_quote = not in_quote
+        elif not in_quote and char == "(":
+            depth += 1
+        elif not in_quote and char == ")":
+            depth -= 1
+        index += 1
+    return depth > 0
+
+
+class Option:
+    def __init__(
+        self,
+        name: str,
+        abbreviation: Optional[str],
+        option_type: str,
+        default: str,
+        description: str = "",
+    ):
+        self.name = name
+        self.abbreviation = abbreviation
+        self.option_type = option_type
+        self.default = default
+        self.scope: Optional[str] = None
+        self.description = description
+
+    def append_description(self, more_description: str):
+        if not more_description:
+            return
+        if self.scope is None and SCOPE_RE.match(more_description):
+            self.scope = more_description
+        elif self.scope is None and has_unclosed_paren(self.default):
+            self.default += " " + more_description
+        else:
+            if self.description:
+                self.description += " "
+            self.description += more_description
+
+    def __str__(self) -> str:
+        return f"Option({self.name}, {self.option_type}, {self.default}, {self.scope})"
@@ -1,12 +1,17 @@
-from typing import Any, IO, List, Optional, Sequence, Tuple
+from typing import Any, Dict, IO, Iterable, List, Optional, Sequence, Tuple, Union
 
 import abc
 import argparse
 import enum
 import logging
+import re
 
 from .command import Command
+from .function import COLUMN_GAP_RE, Function
 from .mode import Mode
+from .option import Option
+from .source import Source, open_lines
+from .table import Fields, TableSpec, parse_tables
 
 
 logger = logging.getLogger(__name__)
@@ -120,55 +125,139 @@ def split_columns(
     return tag, chars, flags, description
 
 
-def read_header(index_fp: IO[str]) -> None:
-    for line in index_fp:
-        if line.startswith("=========="):
-            return
-
-
-def parse_commands(index_fp: IO[str]) -> Sequence[Command]:
-
-    # set up some parser state
-    next_mode: Optional[Mode] = Mode.InsertMode
-    current_mode: Optional[Mode] = None
-    current_command: Optional[Command] = None
-    commands: List[Command] = []
-    lines_to_skip = 0
-
-    read_header(index_fp)
-    for line in index_fp:
-        if lines_to_skip > 0:
-            lines_to_skip -= 1
-            continue
-
-        line = line.replace("\t", " " * 8).rstrip()
-        if current_mode:
-            columns = split_columns(current_mode, line)
-            if columns is None:
-                logger.debug(f'Invalid line: "{line}"')
-                current_command = None
-            else:
-                tag, chars, flags, description = columns
-                if chars is not None:
-                    if current_command is not None:
-                        commands.append(current_command)
-                        if description == '"':
-                            description = current_command.description
-                    current_command = Command(
-                        current_mode, tag, chars, flags, description,
-                    )
-                    logger.debug(f"created {current_command}")
-                else:
-                    assert current_command is not None
-                    assert tag is None
-                    assert len(description) > 0
-                    current_command.append_description(description)
-                    logger.debug(f"appending to {current_command}")
-
-        if next_mode is not None and line.startswith(next_mode.header_text):
-            current_mode = next_mode
-            next_mode = next_mode.next()
-            logger.debug("***", current_mode, "***")
-            lines_to_skip = current_mode.lines_to_skip
-
-    return commands
+OPTION_ROW_RE = re.compile(
+    r"^'([a-z]+)'(?: +'([a-z]+)')? +(boolean|number|string)\b *(.*)$"
+)
+TAG_LINE_RE = re.compile(r"^ *(\*[^ *|]+\* *)+$")
+
+
+class CommandTableSpec(TableSpec[Command]):
+    def __init__(self, mode: Mode):
+        super().__init__(mode.name, mode.header_text, mode.lines_to_skip)
+        self.mode = mode
+
+    def split_row(self, line: str) -> Optional[Tuple[Optional[Fields], str]]:
+        columns = split_columns(self.mode, line)
+        if columns is None:
+            return None
+        tag, chars, flags, description = columns
+        if chars is None:
+            assert tag is None
+            assert len(description) > 0
+            return None, description
+        return (tag, chars, flags), description
+
+    def create(
+        self, fields: Fields, description: str, previous: Optional[Command]
+    ) -> Command:
+        tag, chars, flags = fields
+        assert chars is not None
+        if description == '"' and previous is not None:
+            description = previous.description
+        return Command(self.mode, tag, chars, flags, description)
+
+    def append(self, record: Command, description: str) -> None:
+        record.append_description(description)
+
+
+class OptionTableSpec(TableSpec[Option]):
+    def __init__(self):
+        super().__init__("OptionSummary", "3. Options summary", 0)
+
+    def split_row(self, line: str) -> Optional[Tuple[Optional[Fields], str]]:
+        if line[:1] == "<":
+            # a "<" in column 0 ends a code example, the option's text goes on
+            line = " " + line[1:]
+        if not line.strip() or TAG_LINE_RE.match(line):
+            return None, ""
+        if line[0] == " ":
+            return None, line.strip()
+        match = OPTION_ROW_RE.match(line)
+        if match is None:
+            return None
+        name, abbreviation, option_type, default = match.groups()
+        return (name, abbreviation, option_type, default), ""
+
+    def create(
+        self, fields: Fields, description: str, previous: Optional[Option]
+    ) -> Option:
+        name, abbreviation, option_type, default = fields
+        assert name is not None and option_type is not None and default is not None
+        return Option(name, abbreviation, option_type, default, description)
+
+    def append(self, record: Option, description: str) -> None:
+        record.append_description(description)
+
+
+class FunctionTableSpec(TableSpec[Function]):
+    def __init__(self):
+        super().__init__("FunctionList", "USAGE RESULT DESCRIPTION", 1)
+
+    def split_row(self, line: str) -> Optional[Tuple[Optional[Fields], str]]:
+        if not line:
+            return None
+        if line[0] == " ":
+            return None, line.strip()
+
+        # the usage runs until the parenthesis opened after the name is closed
+        depth = 0
+        for index, char in enumerate(line):
+            if char == "(":
+                depth += 1
+            elif char == ")":
+                depth -= 1
+                if depth == 0:
+                    break
+        else:
+            return None
+        usage = line[: index + 1]
+        name = usage[: usage.index("(")]
+
+        rest = line[index + 1 :].strip()
+        if not rest:
+            return (name, usage, None), ""
+        result, *description = COLUMN_GAP_RE.split(rest, 1)
+        return (name, usage, result), description[0] if description else ""
+
+    def create(
+        self, fields: Fields, description: str, previous: Optional[Function]
+    ) -> Function:
+        name, usage, result = fields
+        assert name is not None and usage is not None
+        return Function(name, usage, result, description)
+
+    def append(self, record: Function, description: str) -> None:
+        record.append_description(description)
+
+
+COMMAND_TABLES: Sequence[CommandTableSpec] = tuple(
+    CommandTableSpec(mode) for mode in Mode
+)
+OPTION_TABLE = OptionTableSpec()
+FUNCTION_TABLE = FunctionTableSpec()
+ALL_TABLES: Sequence[TableSpec] = (*COMMAND_TABLES, OPTION_TABLE, FUNCTION_TABLE)
+
+
+def parse_commands(index_fp: Union[IO[str], Iterable[str]]) -> Sequence[Command]:
+    tables = parse_tables(index_fp, COMMAND_TABLES)
+    return [command for spec in COMMAND_TABLES for command in tables[spec]]
+
+
+def parse_options(options_fp: Union[IO[str], Iterable[str]]) -> Sequence[Option]:
+    return parse_tables(options_fp, (OPTION_TABLE,))[OPTION_TABLE]
+
+
+def parse_functions(eval_fp: Union[IO[str], Iterable[str]]) -> Sequence[Function]:
+    return parse_tables(eval_fp, (FUNCTION_TABLE,))[FUNCTION_TABLE]
+
+
+def parse_help_file(source: Source) -> Sequence[Command]:
+    with open_lines(source) as lines:
+        return parse_commands(lines)
+
+
+def parse_help_tables(
+    source: Source, specs: Sequence[TableSpec] = ALL_TABLES
+) -> Dict[TableSpec, List[Any]]:
+    with open_lines(source) as lines:
+        return parse_tables(lines, specs)
@@ -0,0 +1,231 @@
+from typing import Iterator, Optional, Sequence, Tuple, Union, overload
+
+import mmap
+import os
+import struct
+
+from multiprocessing import shared_memory
+
+try:
+    import _posixshmem
+except ImportError:  # Windows
+    _posixshmem = None
+
+from .command import Command
+from .mode import Mode
+
+# Layout of a published table, all integers little-endian:
+#
+#   header   MAGIC, VERSION, number of records, offset of the string pool
+#   records  one fixed-size RECORD per command
+#   pool     the UTF-8 encoded tag, chars and description of every command
+#
+# Strings are referenced by (offset into the pool, length in bytes), so a reader
+# never has to unpickle or copy anything to get at a single field.
+MAGIC = b"VKCT"
+VERSION = 1
+HEADER = struct.Struct("<4sHxxII")
+RECORD = struct.Struct("<BBxxIIIIII")
+
+MODES: Sequence[Mode] = tuple(Mode)
+MODE_INDICES = {mode: index for index, mode in enumerate(MODES)}
+
+HAS_TAG = 0x1
+IS_CURSOR_MOVEMENT_COMMAND = 0x2
+IS_UNDOABLE = 0x4
+
+
+class SharedTableError(Exception):
+    pass
+
+
+def encode_commands(commands: Sequence[Command]) -> bytes:
+    records = bytearray()
+    pool = bytearray()
+
+    def add_string(s: str) -> Tuple[int, int]:
+        encoded = s.encode("utf-8")
+        offset = len(pool)
+        pool.extend(encoded)
+        return offset, len(encoded)
+
+    for command in commands:
+        bits = 0
+        if command.tag is not None:
+            bits |= HAS_TAG
+        if command.is_cursor_movement_command:
+            bits |= IS_CURSOR_MOVEMENT_COMMAND
+        if command.is_undoable:
+            bits |= IS_UNDOABLE
+        records.extend(
+            RECORD.pack(
+                MODE_INDICES[command.mode],
+                bits,
+                *add_string(command.tag or ""),
+                *add_string(command.chars),
+                *add_string(command.description),
+            )
+        )
+
+    pool_offset = HEADER.size + len(records)
+    header = HEADER.pack(MAGIC, VERSION, len(commands), pool_offset)
+    return header + bytes(records) + bytes(pool)
+
+
+class SharedCommand:
+    """
+    Read-only view of one record in a `SharedCommandTable`, with the same
+    attributes as a `Command`. Strings are decoded from the buffer on access.
+    """
+
+    __slots__ = ("_table", "_index")
+
+    def __init__(self, table: "SharedCommandTable", index: int):
+        self._table = table
+        self._index = index
+
+    def _record(self) -> Tuple[int, ...]:
+        return RECORD.unpack_from(
+            self._table.buf, HEADER.size + self._index * RECORD.size
+        )
+
+    def _string(self, field: int) -> str:
+        record = self._record()
+        offset, length = record[field], record[field + 1]
+        start = self._table.pool_offset + offset
+        return str(self._table.buf[start : start + length], "utf-8")
+
+    @property
+    def mode(self) -> Mode:
+        return MODES[self._record()[0]]
+
+    @property
+    def tag(self) -> Optional[str]:
+        if not self._record()[1] & HAS_TAG:
+            return None
+        return self._string(2)
+
+    @property
+    def chars(self) -> str:
+        return self._string(4)
+
+    @property
+    def description(self) -> str:
+        return self._string(6)
+
+    @property
+    def is_cursor_movement_command(self) -> bool:
+        return bool(self._record()[1] & IS_CURSOR_MOVEMENT_COMMAND)
+
+    @property
+    def is_undoable(self) -> bool:
+        return bool(self._record()[1] & IS_UNDOABLE)
+
+    def __str__(self) -> str:
+        return f"Command({self.mode}, {self.tag}, {self.chars}, {self.description})"
+
+
+class SharedCommandTable(Sequence[SharedCommand]):
+    """
+    A command table living in a flat buffer, either a `SharedMemory` block
+    created by `publish` or a file written by `write` and mapped with `open`.
+    """
+
+    def __init__(
+        self,
+        buf: memoryview,
+        shm: Optional[shared_memory.SharedMemory] = None,
+        mm: Optional[mmap.mmap] = None,
+        is_owner: bool = False,
+    ):
+        self.buf = buf
+        self.shm = shm
+        self.mm = mm
+        self.is_owner = is_owner
+
+        if len(buf) < HEADER.size:
+            raise SharedTableError("buffer too small for a command table")
+        magic, version, self.count, self.pool_offset = HEADER.unpack_from(buf)
+        if magic != MAGIC:
+            raise SharedTableError(f"bad magic {magic!r}")
+        if version != VERSION:
+            raise SharedTableError(f"unsupported table version {version}")
+
+    @classmethod
+    def publish(
+        cls, commands: Sequence[Command], name: Optional[str] = None
+    ) -> "SharedCommandTable":
+        data = encode_commands(commands)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=len(data))
+        shm.buf[: len(data)] = data
+        return cls(shm.buf, shm=shm, is_owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedCommandTable":
+        if _posixshmem is None:
+            shm = shared_memory.SharedMemory(name=name)
+            return cls(shm.buf.toreadonly(), shm=shm)
+
+        # map the block directly rather than through `SharedMemory`, which would
+        # register it with the resource tracker (and unlink it when any attached
+        # worker exits) and can only map it read-write
+        fd = _posixshmem.shm_open("/" + name.lstrip("/"), os.O_RDONLY, mode=0o600)
+        try:
+            mm = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+        return cls(memoryview(mm), mm=mm)
+
+    @staticmethod
+    def write(commands: Sequence[Command], path: str) -> None:
+        with open(path, "wb") as fp:
+            fp.write(encode_commands(commands))
+
+    @classmethod
+    def open(cls, path: str) -> "SharedCommandTable":
+        with open(path, "rb") as fp:
+            mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(memoryview(mm), mm=mm)
+
+    @property
+    def name(self) -> Optional[str]:
+        return None if self.shm is None else self.shm.name
+
+    def __len__(self) -> int:
+        return self.count
+
+    @overload
+    def __getitem__(self, index: int) -> SharedCommand: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[SharedCommand]: ...
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[SharedCommand, Sequence[SharedCommand]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.count))]
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("command index out of range")
+        return SharedCommand(self, index)
+
+    def __iter__(self) -> Iterator[SharedCommand]:
+        for index in range(self.count):
+            yield SharedCommand(self, index)
+
+    def close(self) -> None:
+        self.buf.release()
+        if self.shm is not None:
+            self.shm.close()
+            if self.is_owner:
+                self.shm.unlink()
+        if self.mm is not None:
+            self.mm.close()
+
+    def __enter__(self) -> "SharedCommandTable":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,67 @@
+from typing import IO, Callable, Dict, Iterator, Union
+
+import bz2
+import contextlib
+import gzip
+import io
+import lzma
+import mmap
+import os
+import sys
+
+
+Source = Union[str, "os.PathLike[str]", IO[str]]
+
+# below this size, a buffered read is cheaper than setting up a mapping
+MMAP_THRESHOLD = 1 << 20
+
+DECOMPRESSORS: Dict[str, Callable[..., IO[str]]] = {
+    ".gz": gzip.open,
+    ".xz": lzma.open,
+    ".bz2": bz2.open,
+}
+
+
+def iter_mmap_lines(mm: mmap.mmap, encoding: str) -> Iterator[str]:
+    # decode one line at a time so that lines the parser skips (everything
+    # before the first header, say) never exist as str objects at once
+    start = 0
+    size = len(mm)
+    while start < size:
+        end = mm.find(b"\n", start)
+        end = size if end == -1 else end + 1
+        yield mm[start:end].decode(encoding)
+        start = end
+
+
+@contextlib.contextmanager
+def open_lines(source: Source, encoding: str = "utf-8") -> Iterator[Iterator[str]]:
+    """
+    Yields an iterator over the lines of `source`, which may be an open text
+    file, "-" for stdin, or a path. Compressed paths are decompressed as a
+    stream and large plain files are memory-mapped.
+    """
+
+    if isinstance(source, io.IOBase) or hasattr(source, "read"):
+        yield iter(source)  # type: ignore
+        return
+
+    path = os.fspath(source)  # type: ignore
+    if path == "-":
+        yield iter(sys.stdin)
+        return
+
+    decompress = DECOMPRESSORS.get(os.path.splitext(path)[1])
+    if decompress is not None:
+        with decompress(path, "rt", encoding=encoding) as fp:
+            yield iter(fp)
+        return
+
+    with open(path, "rb") as binary_fp:
+        size = os.fstat(binary_fp.fileno()).st_size
+        if size < MMAP_THRESHOLD:
+            with io.TextIOWrapper(binary_fp, encoding=encoding) as fp:
+                yield iter(fp)
+            return
+        with mmap.mmap(binary_fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield iter_mmap_lines(mm, encoding)
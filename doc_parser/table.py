@@ -0,0 +1,136 @@
+from typing import Any, Dict, Generic, Iterable, List, Optional, Sequence, Tuple, TypeVar
+
+import abc
+import logging
+
+from .key import Trie
+
+
+logger = logging.getLogger(__name__)
+
+
+T = TypeVar("T")
+
+Fields = Tuple[Optional[str], ...]
+
+SEPARATOR = "=========="
+
+
+class TableSpec(abc.ABC, Generic[T]):
+    """
+    Describes one table in a help file: the header that introduces it, how many
+    lines after the header to ignore, and how to turn its lines into records.
+    """
+
+    def __init__(self, name: str, header_text: str, lines_to_skip: int):
+        self.name = name
+        self.header_text = header_text
+        self.lines_to_skip = lines_to_skip
+
+    @abc.abstractmethod
+    def split_row(self, line: str) -> Optional[Tuple[Optional[Fields], str]]:
+        """
+        Returns None if `line` doesn't belong to the table, (None, text) if it
+        continues the previous row, or (fields, text) if it starts a new one.
+        """
+
+    @abc.abstractmethod
+    def create(self, fields: Fields, description: str, previous: Optional[T]) -> T:
+        pass
+
+    @abc.abstractmethod
+    def append(self, record: T, description: str) -> None:
+        pass
+
+    def __str__(self) -> str:
+        return f"TableSpec({self.name})"
+
+
+class HeaderMatcher:
+    """
+    Recognises the header of any of a set of tables with a single walk down a
+    trie of header texts, rather than testing each header in turn.
+    """
+
+    def __init__(self, specs: Sequence[TableSpec]):
+        self.trie = Trie[TableSpec]()
+        for spec in specs:
+            self.trie.insert(spec.header_text, spec)
+
+    def match(self, line: str) -> Optional[TableSpec]:
+        if not line or self.trie.root.get(line[0]) is None:
+            return None
+        # headers are matched with their internal runs of tabs/spaces collapsed
+        _, spec = self.trie.get_longest_prefix(" ".join(line.split()))
+        return spec
+
+
+def parse_tables(
+    help_fp: Iterable[str],
+    specs: Sequence[TableSpec],
+    skip_preamble: bool = True,
+) -> Dict[TableSpec, List[Any]]:
+
+    # set up some parser state
+    matcher = HeaderMatcher(specs)
+    tables: Dict[TableSpec, List[Any]] = {spec: [] for spec in specs}
+    current_spec: Optional[TableSpec] = None
+    current_record: Optional[Any] = None
+    lines_to_skip = 0
+    in_preamble = skip_preamble
+
+    def flush() -> None:
+        nonlocal current_record
+        if current_spec is not None and current_record is not None:
+            tables[current_spec].append(current_record)
+        current_record = None
+
+    for line in help_fp:
+        if in_preamble:
+            in_preamble = not line.startswith(SEPARATOR)
+            continue
+        if lines_to_skip > 0:
+            lines_to_skip -= 1
+            continue
+
+        if "\t" in line:
+            line = line.replace("\t", " " * 8)
+        line = line.rstrip()
+
+        if line.startswith(SEPARATOR):
+            flush()
+            current_spec = None
+            continue
+
+        spec = matcher.match(line)
+        if spec is not None:
+            flush()
+            current_spec = spec
+            logger.debug(f"*** {current_spec} ***")
+            lines_to_skip = current_spec.lines_to_skip
+            continue
+
+        if current_spec is None:
+            continue
+
+        row = current_spec.split_row(line)
+        if row is None:
+            logger.debug(f'Invalid line: "{line}"')
+            flush()
+            continue
+
+        fields, description = row
+        if fields is None:
+            if current_record is None:
+                logger.debug(f'Dangling continuation: "{line}"')
+                continue
+            current_spec.append(current_record, description)
+            logger.debug(f"appending to {current_record}")
+        else:
+            previous = current_record
+            flush()
+            current_record = current_spec.create(fields, description, previous)
+            logger.debug(f"created {current_record}")
+
+    flush()
+    return tables
@@ -0,0 +1,163 @@
+from typing import Dict, IO, Iterator, List, Optional, Tuple
+
+import logging
+import mmap
+import os
+import re
+
+from .command import Command
+
+
+logger = logging.getLogger(__name__)
+
+
+# same rule as Vim's :helptags, a *tag* delimited by whitespace or the line ends
+TAG_DEFINITION_RE = re.compile(rb"(?:^|(?<=\s))\*([^\s*|]+)\*(?=\s|$)")
+
+DOC_DIR_PSEUDO_TAG = "!_TAG_DOC_DIR"
+
+
+class TagIndexError(Exception):
+    pass
+
+
+class TagLocation:
+    def __init__(self, path: str, offset: int, end: int, line: int):
+        self.path = path
+        self.offset = offset
+        self.end = end
+        self.line = line
+
+    def __str__(self) -> str:
+        return f"TagLocation({self.path}, {self.offset}, {self.end}, line={self.line})"
+
+
+def scan_tags(mm: mmap.mmap) -> Iterator[Tuple[str, int, int, int]]:
+    """
+    Yields (tag, offset, end, line) for every tag defined in a help file. A
+    definition's text runs from the start of its line until the next group of
+    tag-defining lines, so stacked aliases ("*x*" over "*y*") share one body.
+    """
+
+    pending: List[Tuple[str, int, int]] = []
+    previous_line_had_tags = False
+    line_number = 0
+    offset = 0
+    size = len(mm)
+    while offset < size:
+        end = mm.find(b"\n", offset)
+        end = size if end == -1 else end + 1
+        line_number += 1
+
+        tags: List[str] = []
+        if mm.find(b"*", offset, end) != -1:
+            line = mm[offset:end].rstrip(b"\r\n")
+            tags = [
+                m.group(1).decode("utf-8") for m in TAG_DEFINITION_RE.finditer(line)
+            ]
+
+        if tags and not previous_line_had_tags:
+            for tag, tag_offset, tag_line in pending:
+                yield tag, tag_offset, offset, tag_line
+            pending = []
+        for tag in tags:
+            pending.append((tag, offset, line_number))
+        previous_line_had_tags = bool(tags)
+        offset = end
+
+    for tag, tag_offset, tag_line in pending:
+        yield tag, tag_offset, size, tag_line
+
+
+class TagIndex:
+    """
+    Maps every `*tag*` defined under a help directory to the byte range of its
+    help text, so that resolving a tag is a dict lookup and one mmap slice.
+    """
+
+    def __init__(self, doc_dir: str, locations: Dict[str, TagLocation]):
+        self.doc_dir = doc_dir
+        self.locations = locations
+        self.mmaps: Dict[str, mmap.mmap] = {}
+
+    @classmethod
+    def build(cls, doc_dir: str) -> "TagIndex":
+        locations: Dict[str, TagLocation] = {}
+        for filename in sorted(os.listdir(doc_dir)):
+            if not filename.endswith(".txt"):
+                continue
+            full_path = os.path.join(doc_dir, filename)
+            if os.path.getsize(full_path) == 0:
+                continue
+            with open(full_path, "rb") as fp:
+                with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    for tag, offset, end, line in scan_tags(mm):
+                        if tag in locations:
+                            logger.debug(f'Duplicate tag "{tag}" in {filename}')
+                            continue
+                        locations[tag] = TagLocation(filename, offset, end, line)
+        return cls(os.path.abspath(doc_dir), locations)
+
+    def save(self, index_fp: IO[str]) -> None:
+        index_fp.write(f"{DOC_DIR_PSEUDO_TAG}\t{self.doc_dir}\n")
+        for tag, location in self.locations.items():
+            index_fp.write(
+                f"{tag}\t{location.path}\t{location.offset}\t{location.end}\t{location.line}\n"
+            )
+
+    @classmethod
+    def load(cls, index_fp: IO[str], doc_dir: Optional[str] = None) -> "TagIndex":
+        locations: Dict[str, TagLocation] = {}
+        saved_doc_dir = ""
+        for index_line_number, line in enumerate(index_fp, start=1):
+            line = line.rstrip("\r\n")
+            if not line:
+                continue
+            fields = line.split("\t")
+            if fields[0] == DOC_DIR_PSEUDO_TAG and len(fields) == 2:
+                saved_doc_dir = fields[1]
+                continue
+            if len(fields) != 5:
+                raise TagIndexError(
+                    f"line {index_line_number}: expected 5 tab-separated fields, "
+                    f"got {len(fields)}"
+                )
+            tag, path, offset, end, line_number = fields
+            try:
+                location = TagLocation(path, int(offset), int(end), int(line_number))
+            except ValueError:
+                raise TagIndexError(
+                    f"line {index_line_number}: bad offset or line number for {tag!r}"
+                ) from None
+            locations[tag] = location
+        return cls(doc_dir or saved_doc_dir, locations)
+
+    def get(self, tag: str) -> Optional[TagLocation]:
+        return self.locations.get(tag, None)
+
+    def help_text(self, tag: str) -> Optional[str]:
+        location = self.get(tag)
+        if location is None:
+            return None
+        mm = self.mmaps.get(location.path)
+        if mm is None:
+            with open(os.path.join(self.doc_dir, location.path), "rb") as fp:
+                mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+            self.mmaps[location.path] = mm
+        return mm[location.offset : location.end].decode("utf-8")
+
+    def command_help(self, command: Command) -> Optional[str]:
+        if command.tag is None:
+            return None
+        return self.help_text(command.tag)
+
+    def close(self) -> None:
+        for mm in self.mmaps.values():
+            mm.close()
+        self.mmaps = {}
+
+    def __enter__(self) -> "TagIndex":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()